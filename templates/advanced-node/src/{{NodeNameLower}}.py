@@ -6,12 +6,90 @@ Author: {{Author}}
 """
 
 import torch
-import numpy as np
+import torch.nn as nn
 from typing import Dict, Any, Tuple, Optional, List
 import json
 import os
+import concurrent.futures
+import functools
+import tempfile
+import threading
+import time
+from types import MappingProxyType
+from pathlib import Path
 from .utils import NodeSettings, UIComponents
 
+# orjson parses small JSON strings 2-3x faster; fall back to the stdlib.
+# orjson.JSONDecodeError subclasses ValueError, so catch ValueError.
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+# Platform temp directory for preview frames, resolved once at import
+_PREVIEW_DIR = Path(tempfile.gettempdir())
+
+# torchvision (and PIL behind it) is only needed for previews, so it is
+# imported on the first preview rather than when ComfyUI loads the node
+_to_pil_image = None
+
+
+def _get_to_pil_image():
+    """Return torchvision's to_pil_image, importing it on first use."""
+    global _to_pil_image
+    if _to_pil_image is None:
+        from torchvision.transforms.v2.functional import to_pil_image
+        _to_pil_image = to_pil_image
+    return _to_pil_image
+
+
+# Settings keys accepted from settings_json; anything else is dropped
+_VALID_SETTING_KEYS = frozenset({
+    "blur_radius", "sharpen_factor", "color_enhancement",
+    "noise_reduction", "edge_preservation", "custom_filter"
+})
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_settings_cached(settings_json: str) -> Tuple[Tuple[str, Any], ...]:
+    """Parse a settings JSON string once; the UI resends the same value every run."""
+    try:
+        settings = _loads(settings_json)
+    except ValueError:
+        return ()
+    
+    if not isinstance(settings, dict):
+        return ()
+    
+    return tuple(settings.items())
+
+
+def _scale_clamp_eager(x: torch.Tensor, scale: float) -> torch.Tensor:
+    return torch.clamp(x * scale, 0.0, 1.0)
+
+
+# TorchScript variant for CPU tensors, where it skips the per-op Python
+# dispatcher overhead without a full Inductor compile; scripted on first CPU
+# run rather than when ComfyUI imports the node
+_scale_clamp = None
+
+
+def _get_scale_clamp():
+    """Return the scripted scale-and-clamp, compiling it on first use."""
+    global _scale_clamp
+    if _scale_clamp is None:
+        _scale_clamp = torch.jit.script(_scale_clamp_eager)
+    return _scale_clamp
+
+
+class _BrightnessKernel(nn.Module):
+    """Pointwise scale-and-clamp, compiled so Inductor fuses it into one pass."""
+
+    def forward(self, x: torch.Tensor, scale: torch.Tensor) -> torch.Tensor:
+        return torch.clamp(x.mul(scale), 0.0, 1.0)
+
 
 class {{NodeName}}:
     """
@@ -36,12 +114,40 @@ class {{NodeName}}:
     HAS_PREVIEW = True
     HAS_SETTINGS = True
     
+    # Constant metadata fields, copied into each result
+    _METADATA_BASE = MappingProxyType({
+        "node_name": "{{NodeName}}",
+        "version": "{{Version}}",
+        "success": True,
+    })
+    
+    # Built once on first request; ComfyUI treats the spec as read-only
+    _INPUT_TYPES_CACHE: Optional[Dict[str, Any]] = None
+    
     def __init__(self):
         """Initialize the advanced node with settings and UI state."""
         self.settings = NodeSettings(node_name="{{NodeNameLower}}")
         self.ui_components = UIComponents()
         self.preview_enabled = True
         self.processing_mode = "standard"
+        # Two pinned buffers: the worker reads one while the next frame lands in the other
+        self._preview_pinned: List[Optional[torch.Tensor]] = [None, None]
+        self._out_buf: Optional[torch.Tensor] = None
+        # Single worker so previews are encoded in order, off the processing thread
+        self._preview_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._preview_lock = threading.Lock()
+        self._preview_next = None  # Latest frame waiting to be encoded
+        self._preview_encoding: Optional[int] = None  # Pinned buffer the worker is reading
+        self._preview_running = False
+        # Modes differ only by their brightness constant, so one compiled
+        # kernel serves all of them; compilation is deferred to first call and
+        # reset to None if it fails (e.g. no Triton), selecting the eager path
+        self._compiled_kernel = torch.compile(_BrightnessKernel(), dynamic=True)
+        self._scale_by_mode = {
+            "standard": 0.2,
+            "enhanced": 0.3,
+            "experimental": 0.5,
+        }
         
     @classmethod
     def INPUT_TYPES(cls) -> Dict[str, Any]:
@@ -51,46 +157,52 @@ class {{NodeName}}:
         Returns:
             Dict containing input specifications with UI enhancements
         """
-        return {
-            "required": {
-                "input_image": ("IMAGE", {
-                    "tooltip": "Primary input image for processing"
-                }),
-                "processing_mode": (["standard", "enhanced", "experimental"], {
-                    "default": "standard",
-                    "tooltip": "Processing algorithm to use"
-                }),
-                "strength": ("FLOAT", {
-                    "default": 1.0,
-                    "min": 0.0,
-                    "max": 2.0,
-                    "step": 0.1,
-                    "display": "slider",
-                    "tooltip": "Processing strength (0.0 = no effect, 2.0 = maximum)"
-                }),
-                "enable_preview": ("BOOLEAN", {
-                    "default": True,
-                    "tooltip": "Show real-time preview of processing"
-                }),
-            },
-            "optional": {
-                "mask": ("MASK", {
-                    "tooltip": "Optional mask to limit processing area"
-                }),
-                "settings_json": ("STRING", {
-                    "multiline": True,
-                    "default": "{}",
-                    "tooltip": "Advanced settings in JSON format"
-                }),
-                "custom_params": ("DICT", {
-                    "tooltip": "Custom parameters from other nodes"
-                }),
-            },
-            "hidden": {
-                "node_id": "UNIQUE_ID",
-                "extra_pnginfo": "EXTRA_PNGINFO",
+        if cls._INPUT_TYPES_CACHE is None:
+            cls._INPUT_TYPES_CACHE = {
+                "required": {
+                    "input_image": ("IMAGE", {
+                        "tooltip": "Primary input image for processing"
+                    }),
+                    "processing_mode": (["standard", "enhanced", "experimental"], {
+                        "default": "standard",
+                        "tooltip": "Processing algorithm to use"
+                    }),
+                    "strength": ("FLOAT", {
+                        "default": 1.0,
+                        "min": 0.0,
+                        "max": 2.0,
+                        "step": 0.1,
+                        "display": "slider",
+                        "tooltip": "Processing strength (0.0 = no effect, 2.0 = maximum)"
+                    }),
+                    "enable_preview": ("BOOLEAN", {
+                        "default": True,
+                        "tooltip": "Show real-time preview of processing"
+                    }),
+                },
+                "optional": {
+                    "mask": ("MASK", {
+                        "tooltip": "Optional mask to limit processing area"
+                    }),
+                    "settings_json": ("STRING", {
+                        "multiline": True,
+                        "default": "{}",
+                        "tooltip": "Advanced settings in JSON format"
+                    }),
+                    "custom_params": ("DICT", {
+                        "tooltip": "Custom parameters from other nodes"
+                    }),
+                    "device": (["auto", "cpu", "cuda"], {
+                        "default": "auto",
+                        "tooltip": "Processing device (auto uses CUDA when available)"
+                    }),
+                },
+                "hidden": {
+                    "node_id": "UNIQUE_ID",
+                    "extra_pnginfo": "EXTRA_PNGINFO",
+                }
             }
-        }
+        return cls._INPUT_TYPES_CACHE
     
     def process(self, 
                 input_image: torch.Tensor,
@@ -100,6 +212,7 @@ class {{NodeName}}:
                 mask: Optional[torch.Tensor] = None,
                 settings_json: str = "{}",
                 custom_params: Optional[Dict] = None,
+                device: str = "auto",
                 node_id: str = "",
                 extra_pnginfo: Optional[Dict] = None) -> Tuple[torch.Tensor, str, Dict]:
         """
@@ -113,13 +226,23 @@ class {{NodeName}}:
             mask: Optional processing mask
             settings_json: Advanced settings in JSON format
             custom_params: Custom parameters from other nodes
+            device: Device to process on ("auto" uses CUDA when available)
             node_id: Unique node identifier
             extra_pnginfo: Extra PNG metadata
             
         Returns:
             Tuple of (processed_image, status_text, metadata)
         """
+        source_image = input_image
+        
         try:
+            # Move the pointwise work to the GPU when available; only the
+            # preview and the final output come back to the source device
+            target_device = self._determine_device(device)
+            input_image = input_image.to(target_device, non_blocking=True)
+            if mask is not None:
+                mask = mask.to(target_device, non_blocking=True)
+            
             # Parse advanced settings
             settings = self._parse_settings(settings_json)
             
@@ -137,18 +260,24 @@ class {{NodeName}}:
             )
             
             # Process image based on mode
-            if processing_mode == "standard":
-                output_image = self._process_standard(context, strength)
-            elif processing_mode == "enhanced":
-                output_image = self._process_enhanced(context, strength, settings)
-            elif processing_mode == "experimental":
-                output_image = self._process_experimental(context, strength, settings)
-            else:
+            if processing_mode not in self._scale_by_mode:
                 raise ValueError(f"Unknown processing mode: {processing_mode}")
             
-            # Apply mask if provided
-            if mask is not None:
-                output_image = self._apply_mask(output_image, input_image, mask)
+            # All-zero and all-one masks need no blend (e.g. "apply to entire image")
+            coverage = self._mask_coverage(mask) if mask is not None else "full"
+            if coverage == "none":
+                # Mask excludes every pixel: the result is the original image
+                output_image = input_image
+            else:
+                # With a partial mask the processed image is only an intermediate
+                # for the blend, so it can live in the reusable scratch buffer
+                output_image = self._run_mode(
+                    input_image, strength, processing_mode, use_scratch=coverage == "partial"
+                )
+                
+                # Apply mask if provided
+                if coverage == "partial":
+                    output_image = self._apply_mask(output_image, input_image, mask)
             
             # Generate preview if enabled
             if enable_preview:
@@ -160,29 +289,32 @@ class {{NodeName}}:
             # Status message
             status_text = f"{{NodeName}} processed successfully using {processing_mode} mode"
             
-            return (output_image, status_text, metadata)
+            # Downstream nodes expect IMAGE tensors where they came from (usually CPU)
+            return (output_image.to(source_image.device), status_text, metadata)
             
-        except Exception as e:
+        except (ValueError, RuntimeError) as e:
             error_msg = f"{{NodeName}} error: {str(e)}"
             # Return original image on error
             empty_metadata = {"error": str(e), "success": False}
-            return (input_image, error_msg, empty_metadata)
+            return (source_image, error_msg, empty_metadata)
+    
+    def _determine_device(self, device: str) -> torch.device:
+        """Resolve the device input to the torch device used for processing."""
+        if device != "cpu" and torch.cuda.is_available():
+            return torch.device("cuda", torch.cuda.current_device())
+        return torch.device("cpu")
     
     def _parse_settings(self, settings_json: str) -> Dict[str, Any]:
         """Parse and validate settings JSON."""
-        try:
-            settings = json.loads(settings_json) if settings_json else {}
-            
-            # Validate settings structure
-            valid_keys = {
-                "blur_radius", "sharpen_factor", "color_enhancement",
-                "noise_reduction", "edge_preservation", "custom_filter"
-            }
-            
-            return {k: v for k, v in settings.items() if k in valid_keys}
-            
-        except json.JSONDecodeError:
+        # Fast path for the common empty case, no parsing needed
+        if not settings_json or settings_json == "{}":
             return {}
+        
+        # Fresh dict per call so callers can mutate it without touching the cache
+        settings = dict(_parse_settings_cached(settings_json))
+        
+        # Validate settings structure
+        return {k: settings[k] for k in settings.keys() & _VALID_SETTING_KEYS}
     
     def _create_processing_context(self, 
                                    input_image: torch.Tensor, 
@@ -193,6 +325,7 @@ class {{NodeName}}:
         batch_size, height, width, channels = input_image.shape
         
         context = {
+            "input_image": input_image,  # Reference only, no copy
             "image_shape": (batch_size, height, width, channels),
             "device": input_image.device,
             "dtype": input_image.dtype,
@@ -203,88 +336,159 @@ class {{NodeName}}:
         
         return context
     
-    def _process_standard(self, context: Dict, strength: float) -> torch.Tensor:
-        """Standard processing algorithm."""
-        # Placeholder for standard processing
-        # In a real implementation, this would contain your core algorithm
-        input_image = context.get("input_image")
-        
-        # Example: simple brightness adjustment
-        processed = input_image * (1.0 + strength * 0.2)
-        return torch.clamp(processed, 0.0, 1.0)
-    
-    def _process_enhanced(self, context: Dict, strength: float, settings: Dict) -> torch.Tensor:
-        """Enhanced processing with additional features."""
-        # Placeholder for enhanced processing
-        input_image = context.get("input_image")
-        
-        # Example: enhanced processing with settings
-        blur_radius = settings.get("blur_radius", 1.0)
-        sharpen_factor = settings.get("sharpen_factor", 0.5)
+    def _run_mode(self,
+                  image: torch.Tensor,
+                  strength: float,
+                  mode: str,
+                  in_place: bool = False,
+                  use_scratch: bool = False) -> torch.Tensor:
+        """
+        Run the processing algorithm for a mode.
         
-        # Apply processing (simplified example)
-        processed = input_image * (1.0 + strength * 0.3)
+        Placeholder: every mode is a brightness adjustment scaled by its
+        constant in _scale_by_mode. Branch on mode here (or add new entries)
+        to implement your own algorithms.
+        """
+        factor = 1.0 + strength * self._scale_by_mode[mode]
         
-        return torch.clamp(processed, 0.0, 1.0)
+        if in_place or use_scratch:
+            return self._scale_into(image, factor, in_place)
+        if not image.is_cuda:
+            return _get_scale_clamp()(image, factor)
+        if self._compiled_kernel is not None:
+            scale = torch.tensor(factor, device=image.device, dtype=image.dtype)
+            try:
+                return self._compiled_kernel(image, scale)
+            except torch.cuda.OutOfMemoryError:
+                raise
+            except Exception as e:
+                # Typically BackendCompilerFailed when Triton is not installed
+                print(f"torch.compile failed, using the eager kernel: {e}")
+                self._compiled_kernel = None
+        return _scale_clamp_eager(image, factor)
     
-    def _process_experimental(self, context: Dict, strength: float, settings: Dict) -> torch.Tensor:
-        """Experimental processing algorithms."""
-        # Placeholder for experimental features
-        input_image = context.get("input_image")
+    def _scale_into(self, image: torch.Tensor, factor: float, in_place: bool) -> torch.Tensor:
+        """
+        Scale and clamp without allocating a new output tensor.
         
-        # Example: experimental processing
-        processed = input_image * (1.0 + strength * 0.5)
+        With in_place the result overwrites image, so only pass tensors the
+        caller owns (never the node's input). Otherwise the result lands in a
+        scratch buffer reused across calls, which is only safe when the result
+        is consumed before the next call (e.g. as input to the mask blend).
+        """
+        if in_place:
+            return image.mul_(factor).clamp_(0.0, 1.0)
         
-        return torch.clamp(processed, 0.0, 1.0)
+        buf = self._out_buf
+        if buf is None or buf.shape != image.shape or buf.dtype != image.dtype or buf.device != image.device:
+            buf = torch.empty(image.shape, dtype=image.dtype, device=image.device)
+            self._out_buf = buf
+        return torch.mul(image, factor, out=buf).clamp_(0.0, 1.0)
+    
+    def _mask_coverage(self, mask: torch.Tensor) -> str:
+        """Classify a mask as "none", "full" or "partial" with one reduction."""
+        # Both bounds come back in a single device-to-host transfer
+        mask_min, mask_max = torch.stack(mask.aminmax()).tolist()
+        if mask_max <= 0.0:
+            return "none"
+        if mask_min >= 1.0:
+            return "full"
+        return "partial"
     
     def _apply_mask(self, 
                     processed_image: torch.Tensor, 
                     original_image: torch.Tensor, 
                     mask: torch.Tensor) -> torch.Tensor:
         """Apply mask to blend processed and original images."""
-        # Ensure mask has the right dimensions
+        # Ensure mask has the right dimensions; (B, H, W, 1) already broadcasts
         if mask.dim() == 3:
             mask = mask.unsqueeze(-1)  # Add channel dimension
+        mask = mask.to(device=processed_image.device, dtype=processed_image.dtype)
         
-        # Blend images using mask
-        return processed_image * mask + original_image * (1.0 - mask)
+        # Blend images using mask in a single fused pass; a fresh output
+        # buffer avoids aliasing either input
+        out = torch.empty_like(processed_image)
+        return torch.lerp(original_image, processed_image, mask, out=out)
     
     def _generate_preview(self, output_image: torch.Tensor, node_id: str) -> None:
-        """Generate preview for the UI."""
+        """Generate preview for the UI without blocking processing."""
         try:
-            # Convert to PIL for preview
-            from PIL import Image
+            # Take first image from batch and quantize on-device, so the
+            # host copy moves uint8 rather than float32 (4x fewer bytes)
+            img_u8 = output_image[0].mul(255.0).clamp_(0, 255).to(torch.uint8).contiguous()
             
-            # Take first image from batch
-            img_array = output_image[0].cpu().numpy()
-            img_array = (img_array * 255).astype(np.uint8)
+            # Save preview (simplified - in real implementation, use ComfyUI's preview system)
+            preview_path = _PREVIEW_DIR / f"{{NodeNameLower}}_preview_{node_id}.png"
             
-            preview_img = Image.fromarray(img_array)
+            with self._preview_lock:
+                copy_done = None
+                slot = None
+                if img_u8.is_cuda:
+                    # Copy into a reusable pinned buffer (one the worker is not
+                    # reading) so the transfer is an async DMA
+                    slot = 1 if self._preview_encoding == 0 else 0
+                    pinned = self._preview_pinned[slot]
+                    if pinned is None or pinned.shape != img_u8.shape:
+                        pinned = torch.empty(img_u8.shape, dtype=torch.uint8, pin_memory=True)
+                        self._preview_pinned[slot] = pinned
+                    pinned.copy_(img_u8, non_blocking=True)
+                    copy_done = torch.cuda.Event()
+                    copy_done.record()
+                    img_u8 = pinned
+                
+                # Real-time preview only needs the latest frame: this replaces any
+                # frame still waiting behind the one being encoded
+                self._preview_next = (img_u8, copy_done, preview_path, slot)
+                if not self._preview_running:
+                    self._preview_running = True
+                    self._preview_executor.submit(self._preview_worker)
             
-            # Save preview (simplified - in real implementation, use ComfyUI's preview system)
-            preview_path = f"/tmp/{{NodeNameLower}}_preview_{node_id}.png"
-            preview_img.save(preview_path)
+        except Exception as e:
+            print(f"Preview generation failed: {e}")
+    
+    def _preview_worker(self) -> None:
+        """Encode waiting preview frames on the worker thread until none is left."""
+        while True:
+            with self._preview_lock:
+                frame, self._preview_next = self._preview_next, None
+                if frame is None:
+                    self._preview_encoding = None
+                    self._preview_running = False
+                    return
+                img_u8, copy_done, preview_path, self._preview_encoding = frame
+            self._write_preview(img_u8, copy_done, preview_path)
+    
+    def _write_preview(self,
+                       img_u8: torch.Tensor,
+                       copy_done: Optional["torch.cuda.Event"],
+                       preview_path: Path) -> None:
+        """Encode and save a preview frame on the preview worker thread."""
+        try:
+            if copy_done is not None:
+                copy_done.synchronize()
+            
+            # to_pil_image takes CHW; it also maps 1/3/4 channels to L/RGB/RGBA.
+            # compress_level=1 trades a slightly larger file for ~3x faster encoding
+            _get_to_pil_image()(img_u8.permute(2, 0, 1)).save(preview_path, compress_level=1)
             
         except Exception as e:
             print(f"Preview generation failed: {e}")
     
     def _create_metadata(self, context: Dict, settings: Dict) -> Dict[str, Any]:
         """Create comprehensive metadata for the processing result."""
-        metadata = {
-            "node_name": "{{NodeName}}",
-            "version": "{{Version}}",
-            "processing_timestamp": torch.tensor([0.0]),  # Placeholder
+        metadata = self._METADATA_BASE.copy()
+        metadata.update({
+            "processing_timestamp": time.perf_counter(),
             "image_shape": context["image_shape"],
             "settings": settings,
-            "success": True,
             "custom_params": context.get("custom_params", {}),
-        }
+        })
 
         return metadata
 
     @classmethod
     def IS_CHANGED(cls, input_image, processing_mode, strength, enable_preview,
-                   mask=None, settings_json="{}", custom_params=None,
+                   mask=None, settings_json="{}", custom_params=None, device="auto",
                    node_id="", extra_pnginfo=None):
         """
         Determines if the node needs re-execution based on input changes.
@@ -316,7 +520,7 @@ class {{NodeName}}:
 
     @classmethod
     def VALIDATE_INPUTS(cls, input_image, processing_mode, strength, enable_preview,
-                        mask=None, settings_json="{}", custom_params=None,
+                        mask=None, settings_json="{}", custom_params=None, device="auto",
                         node_id="", extra_pnginfo=None):
         """
         Validates inputs before the node executes.
@@ -371,6 +575,10 @@ class {{NodeName}}:
             except json.JSONDecodeError as e:
                 return f"Invalid settings_json format: {str(e)}"
 
+        # Validate device availability
+        if device == "cuda" and not torch.cuda.is_available():
+            return "CUDA device requested but not available"
+
         # Validate strength is within usable range
         if strength < 0.0 or strength > 2.0:
             return f"strength must be between 0.0 and 2.0, got {strength}"
@@ -7,12 +7,20 @@ This node is designed for API integrations and external service connections.
 Author: {{Author}}
 """
 
-import requests
 import asyncio
-import aiohttp
 import json
+import hashlib
+import time
+from collections import OrderedDict
 from typing import Dict, Any, Tuple, Optional, List
-import torch
+
+# orjson parses small JSON strings 2-3x faster; fall back to the stdlib.
+# orjson.JSONDecodeError subclasses ValueError, so catch ValueError.
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
 
 class {{NodeName}}:
@@ -32,51 +40,65 @@ class {{NodeName}}:
     FUNCTION = "make_api_call"
     CATEGORY = "{{NodeName}}/api"
     
+    # Built once on first request; ComfyUI treats the spec as read-only
+    _INPUT_TYPES_CACHE: Optional[Dict[str, Any]] = None
+    
     def __init__(self):
         self.session = None
-        self.cache = {}
+        self._session_loop = None
+        # Bounded LRU of responses keyed on a 16-byte request digest
+        self.cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        self._cache_max = 128
         
     @classmethod
     def INPUT_TYPES(cls) -> Dict[str, Any]:
-        return {
-            "required": {
-                "api_url": ("STRING", {
-                    "default": "https://api.example.com/endpoint",
-                    "multiline": False,
-                    "tooltip": "API endpoint URL"
-                }),
-                "method": (["GET", "POST", "PUT", "DELETE", "PATCH"], {
-                    "default": "GET",
-                    "tooltip": "HTTP method"
-                }),
-                "timeout": ("INT", {
-                    "default": 30,
-                    "min": 1,
-                    "max": 300,
-                    "tooltip": "Request timeout in seconds"
-                }),
-            },
-            "optional": {
-                "headers": ("STRING", {
-                    "default": "{}",
-                    "multiline": True,
-                    "tooltip": "Request headers in JSON format"
-                }),
-                "body": ("STRING", {
-                    "default": "",
-                    "multiline": True,
-                    "tooltip": "Request body (for POST/PUT/PATCH)"
-                }),
-                "auth_token": ("STRING", {
-                    "default": "",
-                    "tooltip": "Authorization token"
-                }),
-                "cache_enabled": ("BOOLEAN", {
-                    "default": True,
-                    "tooltip": "Enable response caching"
-                }),
+        if cls._INPUT_TYPES_CACHE is None:
+            cls._INPUT_TYPES_CACHE = {
+                "required": {
+                    "api_url": ("STRING", {
+                        "default": "https://api.example.com/endpoint",
+                        "multiline": False,
+                        "tooltip": "API endpoint URL"
+                    }),
+                    "method": (["GET", "POST", "PUT", "DELETE", "PATCH"], {
+                        "default": "GET",
+                        "tooltip": "HTTP method"
+                    }),
+                    "timeout": ("INT", {
+                        "default": 30,
+                        "min": 1,
+                        "max": 300,
+                        "tooltip": "Request timeout in seconds"
+                    }),
+                },
+                "optional": {
+                    "headers": ("STRING", {
+                        "default": "{}",
+                        "multiline": True,
+                        "tooltip": "Request headers in JSON format"
+                    }),
+                    "body": ("STRING", {
+                        "default": "",
+                        "multiline": True,
+                        "tooltip": "Request body (for POST/PUT/PATCH)"
+                    }),
+                    "auth_token": ("STRING", {
+                        "default": "",
+                        "tooltip": "Authorization token"
+                    }),
+                    "cache_enabled": ("BOOLEAN", {
+                        "default": False,
+                        "tooltip": "Cache successful GET responses (only worth it for repeated identical requests)"
+                    }),
+                    "cache_max_age_s": ("INT", {
+                        "default": 300,
+                        "min": 0,
+                        "max": 86400,
+                        "tooltip": "Seconds a cached response stays valid (0 = never expires)"
+                    }),
+                }
             }
-        }
+        return cls._INPUT_TYPES_CACHE
     
     async def make_api_call(self,
                            api_url: str,
@@ -85,7 +107,8 @@ class {{NodeName}}:
                            headers: str = "{}",
                            body: str = "",
                            auth_token: str = "",
-                           cache_enabled: bool = True) -> Tuple[str, Dict, int, float]:
+                           cache_enabled: bool = False,
+                           cache_max_age_s: int = 300) -> Tuple[str, Dict, int, float]:
         """
         Make an API call with full configuration support.
         
@@ -96,22 +119,37 @@ class {{NodeName}}:
             headers: Additional headers as JSON
             body: Request body
             auth_token: Authorization token
-            cache_enabled: Whether to use caching
+            cache_enabled: Whether to cache GET responses
+            cache_max_age_s: Cached response lifetime in seconds (0 = no expiry)
             
         Returns:
             Tuple of (response_text, response_data, status_code, response_time)
         """
+        # Imported on first call so loading the node at ComfyUI startup stays cheap
+        import aiohttp
+        
         try:
+            # Caching is opt-in: with low hit rates the key and lookup cost more
+            # than they save. Only GET is idempotent, so other methods never cache.
+            use_cache = cache_enabled and method == "GET"
+            
             # Check cache first
-            cache_key = f"{method}:{api_url}:{body}"
-            if cache_enabled and cache_key in self.cache:
-                cached = self.cache[cache_key]
-                return (cached["text"], cached["data"], cached["status"], 0.0)
+            if use_cache:
+                cache_key = hashlib.blake2b(
+                    f"{method}|{api_url}|".encode() + (body or "").encode(), digest_size=16
+                ).digest()
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    if cache_max_age_s and time.monotonic() - cached["stored_at"] > cache_max_age_s:
+                        del self.cache[cache_key]
+                    else:
+                        self.cache.move_to_end(cache_key)
+                        return (cached["text"], cached["data"], cached["status"], 0.0)
             
             # Parse headers
             try:
-                parsed_headers = json.loads(headers) if headers else {}
-            except json.JSONDecodeError:
+                parsed_headers = _loads(headers) if headers else {}
+            except ValueError:
                 parsed_headers = {}
             
             # Add authorization if provided
@@ -124,44 +162,84 @@ class {{NodeName}}:
                     parsed_headers["Content-Type"] = "application/json"
             
             # Make async request
-            start_time = asyncio.get_event_loop().time()
+            start_time = time.perf_counter()
             
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
-                async with session.request(
-                    method=method,
-                    url=api_url,
-                    headers=parsed_headers,
-                    data=body if body else None
-                ) as response:
-                    response_time = asyncio.get_event_loop().time() - start_time
-                    status_code = response.status
-                    response_text = await response.text()
-                    
-                    # Try to parse as JSON
-                    try:
-                        response_data = json.loads(response_text)
-                    except json.JSONDecodeError:
-                        response_data = {"raw_response": response_text}
-                    
-                    # Cache successful responses
-                    if cache_enabled and 200 <= status_code < 300:
-                        self.cache[cache_key] = {
-                            "text": response_text,
-                            "data": response_data,
-                            "status": status_code
-                        }
-                    
-                    return (response_text, response_data, status_code, response_time)
-                    
+            # Reuse one pooled session so TCP/TLS/DNS setup is paid once, not per call.
+            # A session is bound to the loop that created it, and ComfyUI may run
+            # each prompt on a new loop, so rebuild it when the loop changes, closing
+            # the old one first so its connector and sockets are released
+            loop = asyncio.get_running_loop()
+            if self.session is None or self.session.closed or self._session_loop is not loop:
+                await self._close_session()
+                self.session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=60)
+                )
+                self._session_loop = loop
+            
+            async with self.session.request(
+                method=method,
+                url=api_url,
+                headers=parsed_headers,
+                data=body if body else None,
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                response_time = time.perf_counter() - start_time
+                status_code = response.status
+                raw_bytes = await response.read()
+                response_text = raw_bytes.decode("utf-8", errors="replace")
+                
+                # Try to parse as JSON; both parsers accept bytes directly
+                try:
+                    response_data = _loads(raw_bytes)
+                except ValueError:
+                    response_data = {"raw_response": response_text}
+                
+                # Cache successful responses
+                if use_cache and 200 <= status_code < 300:
+                    if len(self.cache) >= self._cache_max:
+                        self.cache.popitem(last=False)
+                    self.cache[cache_key] = {
+                        "text": response_text,
+                        "data": response_data,
+                        "status": status_code,
+                        "stored_at": time.monotonic()
+                    }
+                
+                return (response_text, response_data, status_code, response_time)
+                
         except asyncio.TimeoutError:
             return ("Request timeout", {"error": "timeout"}, 408, timeout)
         except Exception as e:
             error_msg = f"API request failed: {str(e)}"
             return (error_msg, {"error": str(e)}, 500, 0.0)
 
+    async def close(self) -> None:
+        """
+        Close the pooled HTTP session.
+        
+        ComfyUI never calls this; it is for using the node directly from
+        scripts or tests (``async with {{NodeName}}() as node: ...``).
+        """
+        await self._close_session()
+    
+    async def _close_session(self) -> None:
+        """Close the current session (possibly created on an earlier loop) and forget it."""
+        session, self.session, self._session_loop = self.session, None, None
+        if session is not None and not session.closed:
+            try:
+                await session.close()
+            except Exception as e:
+                print(f"Closing previous HTTP session failed: {e}")
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
     @classmethod
     def IS_CHANGED(cls, api_url, method, timeout, headers="{}", body="",
-                   auth_token="", cache_enabled=True):
+                   auth_token="", cache_enabled=False, cache_max_age_s=300):
         """
         Determines if the node needs re-execution based on input changes.
 
@@ -186,16 +264,19 @@ class {{NodeName}}:
         # For API nodes, always re-run by default since external data may change
         # This ensures fresh data from APIs
         # If you want caching, modify based on your API's behavior
-        if not cache_enabled:
+        # Only GET responses are cacheable; other methods must always run
+        if not cache_enabled or method != "GET":
             return float('nan')
 
         # When caching is enabled, hash the request parameters
         # Note: This only prevents redundant calls within the same workflow run
-        return hash((api_url, method, headers, body, auth_token))
+        # The age bucket makes ComfyUI re-run once a cached response expires
+        age_bucket = int(time.time() // cache_max_age_s) if cache_max_age_s else 0
+        return hash((api_url, method, headers, body, auth_token, age_bucket))
 
     @classmethod
     def VALIDATE_INPUTS(cls, api_url, method, timeout, headers="{}", body="",
-                        auth_token="", cache_enabled=True):
+                        auth_token="", cache_enabled=False, cache_max_age_s=300):
         """
         Validates inputs before the node executes.
 
@@ -7,12 +7,184 @@ This node is designed for loading and managing ML models with caching and optimi
 Author: {{Author}}
 """
 
-import torch
 import os
-import hashlib
-from typing import Dict, Any, Tuple, Optional, Union
+
+# Expandable segments let the CUDA caching allocator grow a segment instead of
+# reallocating, which avoids fragmentation-driven OOMs when checkpoints of
+# different sizes are loaded and evicted. This only applies if CUDA has not
+# been initialized yet, and never overrides a user-provided setting (ComfyUI
+# itself sets backend:cudaMallocAsync through this variable).
+_ALLOC_CONF_DEFAULTED = "PYTORCH_CUDA_ALLOC_CONF" not in os.environ
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True,max_split_size_mb:512")
+
+import torch
+import gc
+import importlib
+import importlib.util
+import math
+import stat
+import tempfile
+import threading
+import time
+import functools
+import itertools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from typing import Dict, Any, List, Tuple, Optional, Union
 from pathlib import Path
 import json
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+@functools.lru_cache(maxsize=None)
+def _backend(name: str) -> Optional[Any]:
+    """
+    Import optional loader backend ``name`` on first use, or return None if it
+    is not installed. The result is cached, so later loads skip the import
+    machinery entirely.
+    """
+    try:
+        if importlib.util.find_spec(name) is None:
+            return None
+    except (ImportError, ValueError):
+        return None
+    return importlib.import_module(name)
+
+# Release cached-but-unused CUDA blocks every N optimized loads
+_EMPTY_CACHE_EVERY = 8
+
+@functools.lru_cache(maxsize=256)
+def _detect_model_type_cached(model_path: str, mtime_ns: int) -> str:
+    """
+    Auto-detect model type from file extension and structure.
+    
+    Keyed on mtime so a replaced file is re-detected; repeat loads of an
+    unchanged path skip the directory probes.
+    """
+    path = Path(model_path)
+    
+    if path.suffix == ".safetensors":
+        return "safetensors"
+    elif path.suffix in [".ckpt", ".pth", ".pt"]:
+        return "checkpoint"
+    elif path.suffix == ".onnx":
+        return "onnx"
+    elif path.is_dir():
+        # Check for diffusers structure
+        if (path / "model_index.json").exists():
+            return "diffusers"
+    
+    return "checkpoint"  # Default fallback
+
+
+# Formats whose loaders ignore model_config, so their weights can be shared
+# between cache entries that differ only in configuration
+_INTERNABLE_TYPES = frozenset({"safetensors", "checkpoint"})
+
+
+class _StateDict(dict):
+    """Plain dict subclass so loaded state dicts can be weakly referenced."""
+
+
+# Packages that model_config "module_cls" may name. Workflows are shared as
+# files, so arbitrary import paths from them are not trusted; extend with a
+# comma-separated COMFY_MODULE_CLS_ALLOWLIST (e.g. "my_models,transformers.models")
+_MODULE_CLS_ALLOWLIST = ("torch.nn",) + tuple(
+    p.strip() for p in os.environ.get("COMFY_MODULE_CLS_ALLOWLIST", "").split(",") if p.strip()
+)
+
+# Size of each of the two reused pinned buffers that host tensors are staged
+# through on their way to the GPU
+_STAGING_BYTES = 64 * 1024 * 1024
+
+# Shared workers for load setup that can overlap with file readahead
+_POOL = ThreadPoolExecutor(max_workers=4)
+
+
+@functools.lru_cache(maxsize=1)
+def _enable_tf32() -> None:
+    """Let fp32 matmuls and convolutions use TF32 tensor cores (process-wide, once)."""
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+    torch.set_float32_matmul_precision("high")
+
+
+def _bfp_quantize(tensor: torch.Tensor, group_size: int, mantissa_bits: int) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Quantize a tensor to block floating point.
+    
+    Returns (mantissa, exponent): int8 mantissas of shape (n_groups, group_size)
+    and one shared int8 exponent per group. The tensor is zero-padded to a
+    multiple of group_size.
+    """
+    flat = tensor.detach().reshape(-1).float()
+    pad = (-flat.numel()) % group_size
+    if pad:
+        flat = torch.nn.functional.pad(flat, (0, pad))
+    groups = flat.view(-1, group_size)
+    
+    if _bfp_quantize_kernel is not None and groups.device.type == "cpu":
+        mantissa = torch.empty(groups.shape, dtype=torch.int8)
+        exponent = torch.empty(groups.shape[0], dtype=torch.int8)
+        _bfp_quantize_kernel(groups.contiguous().numpy(), mantissa_bits, mantissa.numpy(), exponent.numpy())
+        return mantissa, exponent
+    
+    # Shared exponent: the smallest power of two covering the group's largest magnitude
+    amax = groups.abs().amax(dim=1).clamp_min(torch.finfo(torch.float32).tiny)
+    exponent = torch.ceil(torch.log2(amax)).clamp_(-127, 127)
+    
+    limit = 2 ** (mantissa_bits - 1) - 1
+    scale = torch.exp2((mantissa_bits - 1) - exponent)
+    mantissa = torch.round(groups * scale[:, None]).clamp_(-limit - 1, limit)
+    return mantissa.to(torch.int8), exponent.to(torch.int8)
+
+
+_bfp_quantize_kernel = None
+
+if njit is not None:
+    @njit(parallel=True, cache=True, fastmath=True)
+    def _bfp_quantize_kernel_impl(groups, mantissa_bits, out_mantissa, out_exponent):
+        """Single-pass numba version of the torch BFP quantizer for CPU tensors."""
+        n_groups, group_size = groups.shape
+        limit = 2 ** (mantissa_bits - 1) - 1
+        for g in prange(n_groups):
+            amax = 2.0 ** -126  # Exactly float32 tiny, as in the torch path, so all-zero groups match
+            for j in range(group_size):
+                v = abs(groups[g, j])
+                if v > amax:
+                    amax = v
+            e = min(max(math.ceil(math.log2(amax)), -127), 127)
+            out_exponent[g] = e
+            scale = 2.0 ** ((mantissa_bits - 1) - e)
+            for j in range(group_size):
+                m = np.rint(groups[g, j] * scale)
+                out_mantissa[g, j] = min(max(m, -limit - 1), limit)
+    
+    # Compile once at import on a dummy input so the on-disk cache is filled
+    # before the first real load; fall back to torch if compilation fails
+    try:
+        _bfp_quantize_kernel_impl(np.zeros((1, 1), dtype=np.float32), 8,
+                                  np.zeros((1, 1), dtype=np.int8), np.zeros(1, dtype=np.int8))
+        _bfp_quantize_kernel = _bfp_quantize_kernel_impl
+    except Exception as e:
+        print(f"numba BFP kernel unavailable, using torch: {e}")
+
+
+def _bfp_dequantize(mantissa: torch.Tensor,
+                    exponent: torch.Tensor,
+                    shape: Tuple[int, ...],
+                    mantissa_bits: int,
+                    dtype: torch.dtype) -> torch.Tensor:
+    """Inverse of _bfp_quantize: rebuild a tensor of the given shape and dtype."""
+    scale = torch.exp2(exponent.float() - (mantissa_bits - 1))
+    values = mantissa.float() * scale[:, None]
+    return values.reshape(-1)[:math.prod(shape)].reshape(shape).to(dtype)
 
 
 class {{NodeName}}:
@@ -32,9 +204,24 @@ class {{NodeName}}:
     FUNCTION = "load_model"
     CATEGORY = "{{NodeName}}/models"
     
+    # Shared by all instances: ComfyUI creates a new node object per graph, so a
+    # per-instance cache would re-read every model whenever a graph is rebuilt.
+    # LRU of loaded models, bounded by the memory their weights occupy
+    _model_cache: "OrderedDict[Tuple[str, str, str, str, str], Any]" = OrderedDict()
+    _model_metadata: Dict[Tuple[str, str, str, str, str], Dict[str, Any]] = {}
+    # Byte accounting counts each tensor storage once, however many entries share
+    # it through _weight_intern: storages held per entry, and (device, data_ptr)
+    # -> [number of entries holding it, nbytes]
+    _entry_storages: Dict[Tuple[str, str, str, str, str], Dict[Any, int]] = {}
+    _storage_refs: Dict[Any, List[int]] = {}
+    _cache_bytes = 0
+    _cache_budget = int(float(os.environ.get("COMFY_MODEL_CACHE_GB", "8")) * 1024**3)
+    # Weakly held, so evicting the last cache entry using them frees the weights
+    _weight_intern: "weakref.WeakValueDictionary[Tuple[str, str, str, str], Any]" = weakref.WeakValueDictionary()
+    _cache_lock = threading.RLock()
+    
     def __init__(self):
-        self.model_cache = {}
-        self.model_metadata = {}
+        self._loads_since_empty_cache = 0
         
     @classmethod
     def INPUT_TYPES(cls) -> Dict[str, Any]:
@@ -44,9 +231,9 @@ class {{NodeName}}:
                     "default": "",
                     "tooltip": "Path to the model file"
                 }),
-                "model_type": (["auto", "safetensors", "checkpoint", "diffusers", "onnx"], {
+                "model_type": (["auto", "safetensors", "checkpoint", "diffusers", "onnx", "bfp"], {
                     "default": "auto",
-                    "tooltip": "Model format type"
+                    "tooltip": "Model format type (bfp = quantize weights to block floating point on load)"
                 }),
                 "device": (["auto", "cpu", "cuda", "mps"], {
                     "default": "auto",
@@ -104,62 +291,227 @@ class {{NodeName}}:
             Tuple of (model, model_info, metadata)
         """
         try:
-            # Validate model path
-            if not model_path or not os.path.exists(model_path):
+            # Validate model path; one stat also supplies mtime and size below
+            try:
+                file_stat = os.stat(model_path) if model_path else None
+            except OSError:
+                file_stat = None
+            if file_stat is None:
                 return (None, f"Model file not found: {model_path}", {"error": "file_not_found"})
             
+            if force_reload:
+                _detect_model_type_cached.cache_clear()
+            
+            # Auto-detect model type if needed; resolved before the cache lookup
+            # because the same file loads differently per type (e.g. "bfp")
+            if model_type == "auto":
+                model_type = _detect_model_type_cached(model_path, file_stat.st_mtime_ns)
+            
             # Generate cache key
-            cache_key = self._generate_cache_key(model_path, device, precision, model_config)
+            cache_key = self._generate_cache_key(model_path, model_type, device, precision, model_config)
             
             # Check cache
-            if cache_enabled and not force_reload and cache_key in self.model_cache:
-                cached_model = self.model_cache[cache_key]
-                metadata = self.model_metadata.get(cache_key, {})
-                return (cached_model, "Model loaded from cache", metadata)
+            if cache_enabled and not force_reload:
+                with self._cache_lock:
+                    if cache_key in self._model_cache:
+                        self._model_cache.move_to_end(cache_key)
+                        cached_model = self._model_cache[cache_key]
+                        metadata = dict(self._model_metadata.get(cache_key, {}))
+                        return (self._shared_view(cached_model), "Model loaded from cache", metadata)
+            
+            # Start kernel readahead of the file, then parse the configuration
+            # and probe the device on worker threads while it runs
+            self._prefetch_file(model_path, file_stat)
+            config_future = _POOL.submit(self._parse_config, model_config)
+            device_future = _POOL.submit(self._determine_device, device)
             
             # Parse model configuration
-            try:
-                config = json.loads(model_config) if model_config else {}
-            except json.JSONDecodeError:
-                config = {}
+            config = config_future.result()
             
             # Determine device
-            target_device = self._determine_device(device)
+            target_device = device_future.result()
             
             # Determine precision
-            target_dtype = self._determine_precision(precision)
+            target_dtype = self._determine_precision(precision, target_device)
             
-            # Auto-detect model type if needed
-            if model_type == "auto":
-                model_type = self._detect_model_type(model_path)
+            # Reuse weights already loaded for another cache entry that differs
+            # only in model_config, instead of holding a second full copy
+            weight_key = (model_path, model_type, target_device, str(target_dtype))
+            internable = model_type in _INTERNABLE_TYPES
+            with self._cache_lock:
+                model = self._weight_intern.get(weight_key) if internable and not force_reload else None
             
-            # Load model based on type
-            model, model_info = self._load_model_by_type(
-                model_path, model_type, target_device, target_dtype, config
-            )
+            if model is not None:
+                model_info = "Model weights shared with an existing cache entry"
+            else:
+                # Load model based on type
+                model, model_info = self._load_model_by_type(
+                    model_path, model_type, target_device, target_dtype, config
+                )
+                if internable and model is not None:
+                    try:
+                        with self._cache_lock:
+                            self._weight_intern[weight_key] = model
+                    except TypeError:
+                        pass  # Object does not support weak references
+            
+            # Optionally wrap a state dict in its module ("module_cls" in model_config)
+            if isinstance(model, dict) and config.get("module_cls"):
+                module_cls = self._resolve_module_cls(config["module_cls"])
+                module_kwargs = config.get("module_kwargs", {})
+                if not isinstance(module_kwargs, dict):
+                    raise ValueError("module_kwargs must be a JSON object")
+                model = self.build_module(module_cls, model, **module_kwargs)
+                model_info = f"{model_info} as {module_cls.__name__}"
             
             # Apply memory optimizations
             if optimize_memory and model is not None:
-                model = self._apply_memory_optimizations(model, target_device)
+                model = self._apply_memory_optimizations(model, target_device, target_dtype, config)
             
             # Generate metadata
-            metadata = self._generate_metadata(model_path, model_type, target_device, target_dtype)
+            metadata = self._generate_metadata(
+                model_path, model_type, target_device, target_dtype, self._path_bytes(model_path, file_stat)
+            )
             
-            # Cache the model
+            # Cache the model; callers share it, so flag it as not to be mutated
             if cache_enabled and model is not None:
-                self.model_cache[cache_key] = model
-                self.model_metadata[cache_key] = metadata
+                metadata["readonly"] = True
+                self._cache_insert(cache_key, model, dict(metadata))
             
-            return (model, model_info, metadata)
+            return (self._shared_view(model), model_info, metadata)
             
         except Exception as e:
             error_msg = f"Failed to load model: {str(e)}"
             return (None, error_msg, {"error": str(e), "success": False})
     
-    def _generate_cache_key(self, model_path: str, device: str, precision: str, config: str) -> str:
+    def _cache_insert(self, cache_key: Tuple[str, str, str, str, str], model: Any, metadata: Dict[str, Any]) -> None:
+        """Insert a model into the LRU cache, evicting old entries to stay within budget."""
+        cls = type(self)
+        # Sized from the loaded tensors; the file size is only a fallback for
+        # models without visible tensors (e.g. ONNX sessions)
+        storages = self._model_storages(model)
+        if not storages:
+            storages = {("file", cache_key): int(metadata.get("file_size_mb", 0) * 1024 * 1024)}
+        evicted = False
+        with cls._cache_lock:
+            if cache_key in cls._model_cache:
+                cls._release_storages(cache_key)
+            
+            cls._model_cache[cache_key] = model
+            cls._model_metadata[cache_key] = metadata
+            cls._model_cache.move_to_end(cache_key)
+            cls._entry_storages[cache_key] = storages
+            for ptr, nbytes in storages.items():
+                ref = cls._storage_refs.setdefault(ptr, [0, nbytes])
+                if ref[0] == 0:
+                    cls._cache_bytes += nbytes
+                ref[0] += 1
+            
+            # Never evict the entry just inserted: a model larger than the whole
+            # budget is still cached, alone, rather than flushing and re-reading
+            while cls._cache_bytes > cls._cache_budget and len(cls._model_cache) > 1:
+                old_key, old_model = cls._model_cache.popitem(last=False)
+                cls._release_storages(old_key)
+                cls._model_metadata.pop(old_key, None)
+                del old_model
+                evicted = True
+        
+        # Return evicted weights to the allocator so the next load can reuse them
+        if evicted:
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+    
+    @staticmethod
+    def _shared_view(model: Any) -> Any:
+        """
+        Return a cached model for a caller without exposing the cached object itself.
+        
+        State dicts get a fresh (shallow) dict over the same tensors, so adding,
+        removing or replacing entries cannot corrupt the cache. Modules and
+        pipelines are returned as-is; metadata["readonly"] marks them as shared.
+        """
+        if isinstance(model, dict):
+            return _StateDict(model)
+        return model
+    
+    @classmethod
+    def _release_storages(cls, cache_key: Tuple[str, str, str, str, str]) -> None:
+        """Drop an entry's storage references; bytes are freed with the last holder."""
+        for ptr in cls._entry_storages.pop(cache_key, {}):
+            ref = cls._storage_refs[ptr]
+            ref[0] -= 1
+            if ref[0] == 0:
+                del cls._storage_refs[ptr]
+                cls._cache_bytes -= ref[1]
+    
+    @staticmethod
+    def _model_storages(model: Any) -> Dict[Any, int]:
+        """Distinct tensor storages ((device, data_ptr) -> nbytes) of a state dict, module or diffusers pipeline."""
+        def tensors(obj: Any):
+            if isinstance(obj, torch.Tensor):
+                yield obj
+            elif isinstance(obj, dict):  # State dicts, including BFP entries
+                for value in obj.values():
+                    yield from tensors(value)
+            elif isinstance(obj, torch.nn.Module):
+                yield from itertools.chain(obj.parameters(), obj.buffers())
+        
+        components = getattr(model, "components", None)  # Diffusers pipelines
+        roots = components.values() if isinstance(components, dict) else (model,)
+        
+        # Keyed by storage, so tied weights and views are not double counted
+        storages: Dict[Any, int] = {}
+        for root in roots:
+            for tensor in tensors(root):
+                storage = tensor.untyped_storage()
+                storages[(str(storage.device), storage.data_ptr())] = storage.nbytes()
+        return storages
+    
+    @staticmethod
+    def _path_bytes(model_path: str, file_stat: os.stat_result) -> int:
+        """On-disk size of a model file, or of every file under a model directory."""
+        if not stat.S_ISDIR(file_stat.st_mode):
+            return file_stat.st_size
+        total = 0
+        for root, _, files in os.walk(model_path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+    
+    def _parse_config(self, model_config: str) -> Dict[str, Any]:
+        """Parse the model configuration JSON, treating invalid input as empty."""
+        try:
+            return json.loads(model_config) if model_config else {}
+        except json.JSONDecodeError:
+            return {}
+    
+    def _prefetch_file(self, model_path: str, file_stat: os.stat_result) -> None:
+        """Ask the OS to start reading a model file into the page cache (POSIX only)."""
+        if not hasattr(os, "posix_fadvise") or not stat.S_ISREG(file_stat.st_mode):
+            return
+        try:
+            fd = os.open(model_path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+    
+    def _generate_cache_key(self,
+                            model_path: str,
+                            model_type: str,
+                            device: str,
+                            precision: str,
+                            config: str) -> Tuple[str, str, str, str, str]:
         """Generate a unique cache key for the model configuration."""
-        content = f"{model_path}:{device}:{precision}:{config}"
-        return hashlib.md5(content.encode()).hexdigest()
+        # The inputs are already hashable strings, so a tuple keys the cache
+        # directly without building and digesting a combined string
+        return (model_path, model_type, device, precision, config)
     
     def _determine_device(self, device: str) -> str:
         """Determine the best device for the model."""
@@ -172,10 +524,20 @@ class {{NodeName}}:
                 return "cpu"
         return device
     
-    def _determine_precision(self, precision: str) -> torch.dtype:
-        """Determine the appropriate dtype for the model."""
+    def _determine_precision(self, precision: str, device: str) -> torch.dtype:
+        """Determine the appropriate dtype for the model on the target device."""
         if precision == "auto":
-            return torch.float16 if torch.cuda.is_available() else torch.float32
+            if device == "cuda":
+                # bf16 moves the same bytes as fp16 but keeps fp32's exponent
+                # range, so no overflow; Ampere (SM 8.x) and newer run it at fp16 speed
+                major, _ = torch.cuda.get_device_capability()
+                if major >= 8 and torch.cuda.is_bf16_supported():
+                    return torch.bfloat16
+                return torch.float16
+            if device == "mps":
+                # bf16 needs macOS 14+ on MPS; fp16 is supported everywhere
+                return torch.float16
+            return torch.float32
         elif precision == "float16":
             return torch.float16
         elif precision == "bfloat16":
@@ -183,23 +545,6 @@ class {{NodeName}}:
         else:
             return torch.float32
     
-    def _detect_model_type(self, model_path: str) -> str:
-        """Auto-detect model type from file extension and structure."""
-        path = Path(model_path)
-        
-        if path.suffix == ".safetensors":
-            return "safetensors"
-        elif path.suffix in [".ckpt", ".pth", ".pt"]:
-            return "checkpoint"
-        elif path.suffix == ".onnx":
-            return "onnx"
-        elif path.is_dir():
-            # Check for diffusers structure
-            if (path / "model_index.json").exists():
-                return "diffusers"
-        
-        return "checkpoint"  # Default fallback
-    
     def _load_model_by_type(self, 
                            model_path: str, 
                            model_type: str, 
@@ -215,89 +560,379 @@ class {{NodeName}}:
         elif model_type == "diffusers":
             return self._load_diffusers(model_path, device, dtype, config)
         elif model_type == "onnx":
-            return self._load_onnx(model_path, config)
+            return self._load_onnx(model_path, device, dtype, config)
+        elif model_type == "bfp":
+            return self._load_quantized(model_path, device, dtype, config)
         else:
             raise ValueError(f"Unsupported model type: {model_type}")
     
     def _load_safetensors(self, model_path: str, device: str, dtype: torch.dtype) -> Tuple[Any, str]:
         """Load SafeTensors model."""
-        try:
-            from safetensors.torch import load_file
-            model_dict = load_file(model_path, device=device)
-            model_info = f"SafeTensors model loaded: {len(model_dict)} tensors"
-            return (model_dict, model_info)
-        except ImportError:
+        # fastsafetensors reads file chunks in parallel and DMAs them straight
+        # to the GPU (GPU Direct Storage when available), bypassing the page cache
+        fastsafetensors = _backend("fastsafetensors") if device in ("cuda", "cpu") else None
+        if fastsafetensors is not None:
+            loader = fastsafetensors.SafeTensorsFileLoader(
+                fastsafetensors.SingleGroup(), torch.device(device), nogds=(device == "cpu")
+            )
+            try:
+                loader.add_filenames({0: [model_path]})
+                fb = loader.copy_files_to_device()
+                try:
+                    # Copy out of the loader's staging buffer, which close() releases;
+                    # the copy doubles as the cast to the target dtype
+                    model_dict = {}
+                    for name in fb.key_to_rank_lidx:
+                        tensor = fb.get_tensor(name)
+                        cast = dtype if tensor.is_floating_point() else tensor.dtype
+                        model_dict[name] = tensor.to(dtype=cast, copy=True)
+                finally:
+                    fb.close()
+            finally:
+                loader.close()
+            model_info = f"SafeTensors model loaded: {len(model_dict)} tensors (fastsafetensors)"
+            return (_StateDict(model_dict), model_info)
+        
+        safetensors_torch = _backend("safetensors.torch")
+        if safetensors_torch is None:
             raise ImportError("safetensors package not installed")
+        if device == "cuda":
+            os.environ.setdefault("SAFETENSORS_FAST_GPU", "1")
+        # load_file places tensors on the device but cannot cast them
+        model_dict = safetensors_torch.load_file(model_path, device=device)
+        model_dict = self._cast_state_dict(model_dict, device, dtype)
+        model_info = f"SafeTensors model loaded: {len(model_dict)} tensors"
+        return (_StateDict(model_dict), model_info)
     
     def _load_checkpoint(self, model_path: str, device: str, dtype: torch.dtype) -> Tuple[Any, str]:
         """Load PyTorch checkpoint."""
-        model_dict = torch.load(model_path, map_location=device)
+        # For CUDA, unpickle on the host so tensors can be staged through
+        # pinned memory and moved and cast in one step
+        map_location = "cpu" if device == "cuda" else device
+        try:
+            # mmap maps tensor storages instead of reading the whole file up
+            # front, and weights_only uses the restricted, safe unpickler
+            model_dict = torch.load(model_path, map_location=map_location, mmap=True, weights_only=True)
+        except RuntimeError as e:
+            # Legacy (pre-zipfile) checkpoints cannot be memory-mapped
+            if "mmap can only be used" not in str(e):
+                raise
+            model_dict = torch.load(model_path, map_location=map_location, weights_only=True)
         
-        # Convert to target dtype
+        # Convert to target device and dtype
         if isinstance(model_dict, dict):
-            for key, tensor in model_dict.items():
-                if isinstance(tensor, torch.Tensor):
-                    model_dict[key] = tensor.to(dtype=dtype)
+            model_dict = _StateDict(self._cast_state_dict(model_dict, device, dtype))
         
         model_info = f"Checkpoint loaded with {len(model_dict)} keys"
         return (model_dict, model_info)
     
+    def _cast_state_dict(self, model_dict: Dict[str, Any], device: str, dtype: torch.dtype) -> Dict[str, Any]:
+        """
+        Move and cast the tensors of a state dict with at most one .to() per tensor.
+        
+        Only floating-point tensors are cast (integer buffers such as position ids
+        keep their dtype), and tensors already matching the target are left alone.
+        """
+        target = torch.device(device)
+        
+        def target_dtype(tensor: torch.Tensor) -> torch.dtype:
+            return dtype if tensor.is_floating_point() else tensor.dtype
+        
+        def on_target(tensor: torch.Tensor) -> bool:
+            return tensor.device.type == target.type and (
+                target.index is None or tensor.device.index == target.index)
+        
+        pending = [k for k, t in model_dict.items()
+                   if isinstance(t, torch.Tensor) and (t.dtype != target_dtype(t) or not on_target(t))]
+        if not pending:
+            return model_dict
+        
+        if device != "cuda":
+            for key in pending:
+                tensor = model_dict[key]
+                model_dict[key] = tensor.to(device=device, dtype=target_dtype(tensor))
+            return model_dict
+        
+        # Host tensors are copied in chunks through two reused pinned buffers, so
+        # each chunk's H2D copy is an async DMA on a side stream that overlaps
+        # with filling the other buffer, while pinned host memory stays bounded
+        # (pinning whole tensors would keep a model-sized pinned pool alive)
+        stream = torch.cuda.Stream()
+        stream.wait_stream(torch.cuda.current_stream())
+        staging: List[torch.Tensor] = []
+        in_flight: List[Optional[torch.cuda.Event]] = [None, None]
+        
+        def stage(tensor: torch.Tensor) -> torch.Tensor:
+            if not staging:
+                staging.extend(torch.empty(_STAGING_BYTES, dtype=torch.uint8, pin_memory=True)
+                               for _ in range(2))
+            src = tensor.contiguous()
+            dst = torch.empty(src.shape, dtype=src.dtype, device=device)
+            src_bytes = src.reshape(-1).view(torch.uint8)
+            dst_bytes = dst.reshape(-1).view(torch.uint8)
+            for i, start in enumerate(range(0, src_bytes.numel(), _STAGING_BYTES)):
+                slot = i % 2
+                if in_flight[slot] is not None:
+                    in_flight[slot].synchronize()  # Previous DMA out of this buffer is done
+                chunk = src_bytes[start:start + _STAGING_BYTES]
+                buf = staging[slot][:chunk.numel()]
+                buf.copy_(chunk)
+                dst_bytes[start:start + chunk.numel()].copy_(buf, non_blocking=True)
+                in_flight[slot] = torch.cuda.Event()
+                in_flight[slot].record(stream)
+            return dst.to(dtype=target_dtype(tensor))
+        
+        with torch.cuda.stream(stream):
+            # Tensors already on the GPU only need a cast: batch them through
+            # one multi-tensor copy instead of one kernel launch per tensor
+            on_device = [k for k in pending if model_dict[k].is_cuda]
+            if on_device and hasattr(torch, "_foreach_copy_"):
+                sources = [model_dict[k] for k in on_device]
+                converted = [torch.empty_like(t, dtype=target_dtype(t)) for t in sources]
+                torch._foreach_copy_(converted, sources, non_blocking=True)
+                model_dict.update(zip(on_device, converted))
+            
+            # Remaining tensors (on-device ones are now no-op .to() calls)
+            for key in pending:
+                tensor = model_dict[key]
+                if tensor.is_cuda:
+                    model_dict[key] = tensor.to(device=device, dtype=target_dtype(tensor), non_blocking=True)
+                else:
+                    model_dict[key] = stage(tensor)
+        stream.synchronize()
+        
+        # Memory allocated on the side stream is used on the current stream from
+        # now on; tell the caching allocator so it is not reused too early
+        current = torch.cuda.current_stream()
+        for key in pending:
+            tensor = model_dict[key]
+            if tensor.is_cuda:
+                tensor.record_stream(current)
+        return model_dict
+    
+    def _load_quantized(self, model_path: str, device: str, dtype: torch.dtype, config: Dict) -> Tuple[Any, str]:
+        """
+        Load a state dict and quantize its weights to block floating point (BFP).
+        
+        Each weight is split into groups of ``group_size`` values sharing one
+        power-of-two exponent, and every value keeps a signed int8 mantissa of
+        ``mantissa_bits`` bits, roughly 4x fewer bytes than fp32. Quantized
+        weights are stored as dicts (see ``dequantize_bfp``); 0-D/1-D tensors
+        such as biases and norms stay in ``dtype``.
+        
+        ``group_size`` (default 32) and ``mantissa_bits`` (default 8) are read
+        from model_config.
+        """
+        group_size = int(config.get("group_size", 32))
+        mantissa_bits = int(config.get("mantissa_bits", 8))
+        if group_size < 1:
+            raise ValueError(f"group_size must be positive, got {group_size}")
+        if not 2 <= mantissa_bits <= 8:
+            raise ValueError(f"mantissa_bits must be between 2 and 8, got {mantissa_bits}")
+        
+        if Path(model_path).suffix == ".safetensors":
+            model_dict, _ = self._load_safetensors(model_path, device, dtype)
+        else:
+            model_dict, _ = self._load_checkpoint(model_path, device, dtype)
+        if not isinstance(model_dict, dict):
+            raise ValueError("BFP quantization requires a state dict checkpoint")
+        
+        quantized = 0
+        for key, tensor in model_dict.items():
+            if isinstance(tensor, torch.Tensor) and tensor.is_floating_point() and tensor.dim() >= 2:
+                mantissa, exponent = _bfp_quantize(tensor, group_size, mantissa_bits)
+                model_dict[key] = {
+                    "mantissa": mantissa,
+                    "exponent": exponent,
+                    "shape": tuple(tensor.shape),
+                    "dtype": tensor.dtype,
+                    "mantissa_bits": mantissa_bits,
+                }
+                quantized += 1
+        
+        model_info = (f"BFP model loaded: {quantized}/{len(model_dict)} tensors quantized "
+                      f"(group_size={group_size}, mantissa_bits={mantissa_bits})")
+        return (model_dict, model_info)
+    
+    @staticmethod
+    def build_module(module_cls: type, state_dict: Dict[str, Any], **kwargs: Any) -> torch.nn.Module:
+        """
+        Build ``module_cls(**kwargs)`` around an already-loaded state dict.
+        
+        The module is constructed on the meta device and then adopts the state
+        dict tensors (``assign=True``), so parameters are never allocated or
+        initialized twice. The state dict must cover every parameter and buffer.
+        """
+        if not (isinstance(module_cls, type) and issubclass(module_cls, torch.nn.Module)):
+            raise TypeError(f"module_cls must be a torch.nn.Module subclass, got {module_cls!r}")
+        with torch.device("meta"):
+            module = module_cls(**kwargs)
+        module.load_state_dict(state_dict, assign=True)
+        
+        uninitialized = [name for name, t in itertools.chain(module.named_parameters(), module.named_buffers())
+                         if t.is_meta]
+        if uninitialized:
+            raise ValueError(f"State dict does not initialize: {', '.join(uninitialized[:5])}")
+        return module
+    
+    @staticmethod
+    def _resolve_module_cls(dotted_path: Any) -> type:
+        """
+        Resolve a dotted path such as ``"package.module.ClassName"`` to an
+        nn.Module subclass. The path must fall under _MODULE_CLS_ALLOWLIST, which
+        is checked before anything is imported.
+        """
+        if not isinstance(dotted_path, str):
+            raise ValueError(f"module_cls must be a dotted path string, got {dotted_path!r}")
+        module_name, _, attr = dotted_path.rpartition(".")
+        if not module_name or not attr:
+            raise ValueError(f"module_cls must be a dotted path, got {dotted_path!r}")
+        if not any(module_name == p or module_name.startswith(p + ".") for p in _MODULE_CLS_ALLOWLIST):
+            raise ValueError(f"module_cls {dotted_path!r} is not in an allowed package "
+                             f"(set COMFY_MODULE_CLS_ALLOWLIST to permit it)")
+        
+        module_cls = getattr(importlib.import_module(module_name), attr, None)
+        if not (isinstance(module_cls, type) and issubclass(module_cls, torch.nn.Module)):
+            raise ValueError(f"module_cls {dotted_path!r} is not a torch.nn.Module subclass")
+        return module_cls
+    
+    @staticmethod
+    def dequantize_bfp(entry: Dict[str, Any]) -> torch.Tensor:
+        """Rebuild a tensor from a BFP entry produced by the "bfp" model type."""
+        return _bfp_dequantize(entry["mantissa"], entry["exponent"], entry["shape"],
+                               entry["mantissa_bits"], entry["dtype"])
+    
     def _load_diffusers(self, model_path: str, device: str, dtype: torch.dtype, config: Dict) -> Tuple[Any, str]:
         """Load Diffusers model."""
-        try:
-            from diffusers import DiffusionPipeline
-            pipeline = DiffusionPipeline.from_pretrained(
-                model_path,
-                torch_dtype=dtype,
-                device_map=device,
-                **config
-            )
-            model_info = f"Diffusers pipeline loaded: {type(pipeline).__name__}"
-            return (pipeline, model_info)
-        except ImportError:
+        diffusers = _backend("diffusers")
+        if diffusers is None:
             raise ImportError("diffusers package not installed")
+        pipeline = diffusers.DiffusionPipeline.from_pretrained(
+            model_path,
+            torch_dtype=dtype,
+            device_map=device,
+            **config
+        )
+        model_info = f"Diffusers pipeline loaded: {type(pipeline).__name__}"
+        return (pipeline, model_info)
     
-    def _load_onnx(self, model_path: str, config: Dict) -> Tuple[Any, str]:
+    def _load_onnx(self, model_path: str, device: str, dtype: torch.dtype, config: Dict) -> Tuple[Any, str]:
         """Load ONNX model."""
-        try:
-            import onnxruntime as ort
-            session = ort.InferenceSession(model_path, **config)
-            model_info = f"ONNX model loaded with {len(session.get_inputs())} inputs"
-            return (session, model_info)
-        except ImportError:
+        ort = _backend("onnxruntime")
+        if ort is None:
             raise ImportError("onnxruntime package not installed")
+        
+        # Full graph optimization (constant folding, node fusions, layout
+        # transforms); explicit "providers" in model_config still win
+        session_config = dict(config)
+        providers = session_config.pop("providers", None) or self._onnx_providers(ort, model_path, device, dtype)
+        sess_options = ort.SessionOptions()
+        sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        
+        session = ort.InferenceSession(
+            model_path, sess_options=sess_options, providers=providers, **session_config
+        )
+        model_info = (f"ONNX model loaded with {len(session.get_inputs())} inputs "
+                      f"({session.get_providers()[0]})")
+        return (session, model_info)
+    
+    def _onnx_providers(self, ort: Any, model_path: str, device: str, dtype: torch.dtype) -> List[Any]:
+        """Pick ONNX Runtime execution providers for the target device, best first."""
+        if device != "cuda":
+            return ["CPUExecutionProvider"]
+        
+        available = set(ort.get_available_providers())
+        providers: List[Any] = []
+        
+        # TensorRT fuses kernels (and uses FP16 tensor cores when float16 was
+        # resolved); its engines are cached so later sessions skip the build.
+        # The cache directory is only created when TensorRT is actually present
+        if "TensorrtExecutionProvider" in available:
+            trt_options = {"trt_fp16_enable": dtype == torch.float16}
+            cache_dir = self._trt_cache_dir(model_path)
+            if cache_dir is not None:
+                trt_options.update(trt_engine_cache_enable=True, trt_engine_cache_path=cache_dir)
+            providers.append(("TensorrtExecutionProvider", trt_options))
+        if "CUDAExecutionProvider" in available:
+            providers.append(("CUDAExecutionProvider", {"device_id": torch.cuda.current_device()}))
+        providers.append("CPUExecutionProvider")
+        return providers
     
-    def _apply_memory_optimizations(self, model: Any, device: str) -> Any:
+    @staticmethod
+    def _trt_cache_dir(model_path: str) -> Optional[str]:
+        """First writable TensorRT engine cache directory: next to the model, then per-user."""
+        user_cache = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+        candidates = (
+            Path(model_path).parent / "trt_cache",
+            user_cache / "{{NodeNameLower}}" / "trt_cache",
+            Path(tempfile.gettempdir()) / "{{NodeNameLower}}_trt_cache",
+        )
+        for candidate in candidates:
+            try:
+                candidate.mkdir(parents=True, exist_ok=True)
+            except OSError:
+                continue
+            if os.access(candidate, os.W_OK):
+                return str(candidate)
+        return None
+    
+    def _apply_memory_optimizations(self, model: Any, device: str, dtype: torch.dtype, config: Dict) -> Any:
         """Apply memory optimizations to the model."""
         try:
             if hasattr(model, 'eval'):
                 model.eval()
             
-            if device == "cuda" and hasattr(model, 'half'):
+            # Only when fp16 was resolved: bf16/fp32 choices must not be overridden
+            if device == "cuda" and dtype == torch.float16 and hasattr(model, 'half'):
                 model = model.half()
             
             if hasattr(torch.backends.cudnn, 'benchmark'):
                 torch.backends.cudnn.benchmark = True
+            
+            if device == "cuda":
+                _enable_tf32()
+                
+                # Opt-in: compile the denoising network of diffusers pipelines
+                if config.get("compile_unet") and hasattr(model, "unet") and hasattr(torch, "compile"):
+                    model.unet = torch.compile(model.unet, mode="reduce-overhead")
+                
+                # Covers the case where CUDA was already initialized before this
+                # module set PYTORCH_CUDA_ALLOC_CONF (torch >= 2.1); only when the
+                # default above was ours and the native caching allocator is in use
+                set_allocator_settings = getattr(torch.cuda.memory, "_set_allocator_settings", None)
+                if (_ALLOC_CONF_DEFAULTED and set_allocator_settings is not None
+                        and torch.cuda.get_allocator_backend() == "native"):
+                    set_allocator_settings("expandable_segments:True")
+                
+                self._loads_since_empty_cache += 1
+                if self._loads_since_empty_cache >= _EMPTY_CACHE_EVERY:
+                    torch.cuda.empty_cache()
+                    self._loads_since_empty_cache = 0
                 
         except Exception as e:
             print(f"Memory optimization warning: {e}")
         
         return model
     
-    def _generate_metadata(self, model_path: str, model_type: str, device: str, dtype: torch.dtype) -> Dict[str, Any]:
+    def _generate_metadata(self,
+                           model_path: str,
+                           model_type: str,
+                           device: str,
+                           dtype: torch.dtype,
+                           file_size: int) -> Dict[str, Any]:
         """Generate comprehensive metadata for the loaded model."""
         metadata = {
             "model_path": model_path,
             "model_type": model_type,
             "device": device,
             "dtype": str(dtype),
-            "file_size_mb": os.path.getsize(model_path) / (1024 * 1024),
-            "load_timestamp": torch.tensor([0.0]),  # Placeholder
+            "file_size_mb": file_size / (1024 * 1024),
+            "load_timestamp": time.perf_counter_ns(),
             "success": True,
         }
 
-        # Add device-specific information
-        if device == "cuda":
+        # Add device-specific information (without creating a CUDA context)
+        if device == "cuda" and torch.cuda.is_initialized():
             metadata["cuda_memory_allocated"] = torch.cuda.memory_allocated() / (1024**3)  # GB
             metadata["cuda_memory_reserved"] = torch.cuda.memory_reserved() / (1024**3)   # GB
 
@@ -394,6 +1029,7 @@ class {{NodeName}}:
                 "safetensors": [".safetensors"],
                 "checkpoint": [".ckpt", ".pth", ".pt", ".bin"],
                 "onnx": [".onnx"],
+                "bfp": [".safetensors", ".ckpt", ".pth", ".pt", ".bin"],
                 "auto": [".safetensors", ".ckpt", ".pth", ".pt", ".bin", ".onnx"],
             }
 
@@ -0,0 +1,32 @@
+"""
+Optional ahead-of-time compilation of the node with mypyc.
+
+    pip install mypy
+    python setup.py
+
+This builds a C extension next to src/{{NodeNameLower}}.py. Python imports the
+extension in preference to the .py file, so nothing else changes; delete the
+built file (or never build it) to run the plain Python source. Rebuild after
+editing the node or renaming its directory.
+"""
+import os
+
+from setuptools import Distribution
+from mypyc.build import mypycify
+
+# ComfyUI imports the node as a package named after this directory, and mypyc
+# names the compiled module the same way, so map that package back onto "."
+here = os.path.dirname(os.path.abspath(__file__))
+os.chdir(here)
+
+# The build is driven directly rather than through setup(), which would also
+# validate pyproject.toml (Comfy Registry metadata, not build configuration)
+dist = Distribution({
+    "name": "{{NodeNameLower}}",
+    "package_dir": {os.path.basename(here): "."},
+    "ext_modules": mypycify(["src/{{NodeNameLower}}.py"], opt_level="3"),
+    "script_name": "setup.py",
+    "script_args": ["build_ext", "--inplace"],
+})
+dist.parse_command_line()
+dist.run_commands()
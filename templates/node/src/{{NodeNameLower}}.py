@@ -1,5 +1,15 @@
 import typing
 
+try:
+    from mypy_extensions import mypyc_attr
+except ImportError:  # Only needed when compiling with mypyc (see setup.py)
+    def mypyc_attr(*attrs: str, **kwattrs: object) -> typing.Callable[[typing.Any], typing.Any]:  # type: ignore[misc]
+        return lambda cls: cls
+
+
+# Compiled as a regular Python class so ComfyUI can still set attributes on it
+# (e.g. RELATIVE_PYTHON_MODULE); the methods themselves are compiled to C
+@mypyc_attr(native_class=False)
 class {{NodeName}}:
     """
     Example ComfyUI Custom Node
@@ -17,7 +27,7 @@ class {{NodeName}}:
     """
 
     @classmethod
-    def INPUT_TYPES(cls):
+    def INPUT_TYPES(cls) -> typing.Dict[str, typing.Any]:
         return {
             "required": {
                 "input_text": ("STRING", {"default": "Hello, Comfy!", "multiline": False}),
@@ -36,7 +46,8 @@ class {{NodeName}}:
     CATEGORY = "custom"
     DISPLAY_NAME = "Example Custom Node"
 
-    def run(self, input_text: str, input_number: int, input_bool: bool, input_choice: str, input_optional: typing.Optional[str] = None):
+    def run(self, input_text: str, input_number: int, input_bool: bool, input_choice: str,
+            input_optional: typing.Optional[str] = None) -> typing.Tuple[str, int, bool, str]:
         """
         Main node logic. Processes inputs and returns outputs.
 
@@ -67,7 +78,8 @@ class {{NodeName}}:
         return (output_text, output_number, output_bool, output_choice)
 
     @classmethod
-    def IS_CHANGED(cls, input_text, input_number, input_bool, input_choice, input_optional=None):
+    def IS_CHANGED(cls, input_text: str, input_number: int, input_bool: bool, input_choice: str,
+                   input_optional: typing.Optional[str] = None) -> typing.Any:
         """
         Determines if the node needs re-execution based on input changes.
 
@@ -95,7 +107,8 @@ class {{NodeName}}:
         return hash((input_text, input_number, input_bool, input_choice, input_optional))
 
     @classmethod
-    def VALIDATE_INPUTS(cls, input_text, input_number, input_bool, input_choice, input_optional=None):
+    def VALIDATE_INPUTS(cls, input_text: str, input_number: int, input_bool: bool, input_choice: str,
+                        input_optional: typing.Optional[str] = None) -> typing.Union[bool, str]:
         """
         Validates inputs before the node executes.
 
@@ -130,7 +143,7 @@ class {{NodeName}}:
         return True
 
     @classmethod
-    def BATCHED(cls):
+    def BATCHED(cls) -> bool:
         """
         Optional: Return True if this node supports batched processing.
         """